@@ -43,6 +43,10 @@ class Nmfsc:
     sW: float, optional, default = 0.25
         The sparseness imposed on each column of :math:`W`, in case version = 'l'.
 
+    prng: numpy.random.RandomState, optional
+        The random number generator used to initialize the :math:`W` and :math:`H`
+        matrices; if not given, a generator seeded from OS entropy is created.
+
     References
     ----------
     [1] Patrick Hoyer. Nmfpack. https://github.com/aludnam/MATLAB/tree/master/nmfpack.
@@ -62,8 +66,10 @@ class Nmfsc:
         version="l",
         sH=0.25,
         sW=0.25,
+        prng=None,
     ):
         self.V = np.asmatrix(V)
+        self.prng = np.random.RandomState() if prng is None else prng
         self.W = W
         self.H = H
         self.rank = rank
@@ -138,7 +144,7 @@ class Nmfsc:
         """
         for run in range(self.n_runs):
             # Create initial matrices
-            prng = np.random.RandomState()
+            prng = self.prng
             self.W = np.mat(np.zeros((self.V.shape[0], self.rank)))
             self.H = np.mat(np.zeros((self.rank, self.V.shape[1])))
             for i in range(self.rank):
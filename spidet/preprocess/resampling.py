@@ -1,9 +1,38 @@
+from math import gcd
 from typing import List
 
-import mne
 import numpy as np
 
-from mne.io import RawArray
+from scipy.signal import resample_poly
+
+
+def resampled_length(n_samples: int, sfreq: int, resampling_freq: int) -> int:
+    """
+    Computes the number of samples :py:func:`resample_data` produces for an input
+    of length n_samples, without performing the resampling.
+
+    Parameters
+    ----------
+    n_samples : int
+        Number of samples of the data to be resampled.
+
+    sfreq : float
+        Original frequency of the data.
+
+    resampling_freq : float
+        Target resampling frequency.
+
+    Returns
+    -------
+    int
+        Number of samples of the resampled data.
+    """
+    if float(sfreq).is_integer() and float(resampling_freq).is_integer():
+        divisor = gcd(int(sfreq), int(resampling_freq))
+        up = int(resampling_freq) // divisor
+        down = int(sfreq) // divisor
+        return -(-n_samples * up // down)
+    return int(round(n_samples * resampling_freq / sfreq))
 
 
 def resample_data(
@@ -31,8 +60,21 @@ def resample_data(
     array-like
         Resampled data.
     """
+    if float(sfreq).is_integer() and float(resampling_freq).is_integer():
+        # Rational resampling ratio: a polyphase FIR resampler works directly
+        # on the data with a single allocation, no FFT and no construction of
+        # an MNE RawArray (which copies the data twice per call); the linear
+        # edge padding keeps the boundary behavior sensible for EEG
+        divisor = gcd(int(sfreq), int(resampling_freq))
+        up = int(resampling_freq) // divisor
+        down = int(sfreq) // divisor
+        return resample_poly(data, up, down, axis=-1, padtype="line")
+
+    # Non-rational ratios are left to MNE's FFT-based resampling
+    import mne
+
     info = mne.create_info(ch_names=channel_names, sfreq=sfreq)
-    resampled_data = RawArray(data, info=info, verbose=False).resample(
+    resampled_data = mne.io.RawArray(data, info=info, verbose=False).resample(
         sfreq=resampling_freq, verbose=False
     )
     return resampled_data.get_data()
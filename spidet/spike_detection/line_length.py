@@ -1,19 +1,73 @@
 import multiprocessing
+from multiprocessing import shared_memory
+from pathlib import Path
 from typing import List, Tuple
 
 import numpy as np
 from loguru import logger
+from numba import njit, prange
 from scipy.signal.windows import hann
 
 from spidet.domain.ActivationFunction import ActivationFunction
 from spidet.domain.Trace import Trace
 from spidet.load.data_loading import DataLoader
 from spidet.preprocess.preprocessing import apply_preprocessing_steps
-from spidet.preprocess.resampling import resample_data
+from spidet.preprocess.resampling import resample_data, resampled_length
 from spidet.spike_detection.thresholding import ThresholdGenerator
+from spidet.utils.pool_utils import limit_worker_threads
 from spidet.utils.times_utils import compute_rescaled_timeline
 
 
+@njit(parallel=True, fastmath=True, cache=True)
+def _line_length_kernel(
+    eeg_data: np.ndarray, w_eff: int, out_offset: int, out: np.ndarray
+) -> None:
+    """
+    Fused line-length kernel: for every channel and time point t, sum the absolute
+    differences of consecutive samples over a window of w_eff samples starting at t,
+    treating samples beyond the end of the signal as zeros. Compiled with Numba so
+    the abs, diff and windowed sum fuse into a single pass without intermediates,
+    parallelized over channels. The windowed sum is maintained incrementally: when
+    the window advances by one sample, one abs-diff term leaves and one enters,
+    so the work per output sample is O(1) instead of O(w_eff).
+
+    The values are written shifted by out_offset columns (the leading columns are
+    zeroed), centering each value on its window directly in the output buffer.
+    """
+    nr_channels, duration = eeg_data.shape
+    n_values = out.shape[1] - out_offset
+    for channel in prange(nr_channels):
+        # for signals shorter than half a window the offset exceeds the output
+        # width; clamp the zero fill and skip the window writes entirely so no
+        # index reaches past the buffer (njit performs no bounds checking)
+        for t in range(min(out_offset, out.shape[1])):
+            out[channel, t] = 0.0
+        if n_values <= 0:
+            continue
+
+        # sum of the initial window
+        acc = 0.0
+        for j in range(min(w_eff - 1, duration)):
+            if j + 1 < duration:
+                acc += abs(eeg_data[channel, j + 1] - eeg_data[channel, j])
+            else:
+                # window reaches beyond the signal, the last sample drops to zero
+                acc += abs(eeg_data[channel, j])
+        out[channel, out_offset] = acc
+
+        for t in range(1, n_values):
+            # remove the term leaving the window
+            acc -= abs(eeg_data[channel, t] - eeg_data[channel, t - 1])
+
+            # add the term entering the window
+            j = t + w_eff - 2
+            if j < duration - 1:
+                acc += abs(eeg_data[channel, j + 1] - eeg_data[channel, j])
+            elif j == duration - 1:
+                acc += abs(eeg_data[channel, j])
+            out[channel, t + out_offset] = acc
+
+
 class LineLength:
     """
     This class provides all operations regarding the line-length transformation.
@@ -56,6 +110,8 @@ class LineLength:
         bad_times: np.ndarray = None,
     ):
         self.file_path = file_path
+        # filename without directory and extension, used as unique id prefix
+        self._file_stem = Path(file_path).stem
         self.dataset_paths = dataset_paths
         self.exclude = exclude
         self.bipolar_reference = bipolar_reference
@@ -157,9 +213,8 @@ class LineLength:
 
         Notes
         -----
-        The line length operation involves slicing the input data into evenly spaced intervals
-        along the time axis and processing each block separately. It computes the summed absolute
-        difference of the data along consecutive time points over a predefined segment. [1]_
+        The line length operation computes the summed absolute difference of the data
+        along consecutive time points over a predefined segment. [1]_
 
         References
         ----------
@@ -169,6 +224,10 @@ class LineLength:
         Automated burst detection in premature EEG recordings.
         Clinical Neurophysiology, 125(10), 1985–1994. https://doi.org/https://doi.org/10.1016/j.clinph.2014.02.015
         """
+        # line length is fed into NMF only after normalization and a downsample,
+        # float32 precision is sufficient and halves the memory traffic
+        eeg_data = np.asarray(eeg_data, dtype=np.float32)
+
         # shape of the data: number of channels x duration
         nr_channels, duration = np.shape(eeg_data)
 
@@ -178,54 +237,15 @@ class LineLength:
         # effective window size: round to nearest even in the data points
         w_eff = 2 * round(sfreq * window / 2000)
 
-        # to optimize computation, calculations are performed on intervals built from 40000 evenly spaced
-        # discrete time points along the duration of the signal
-        time_points = np.round(
-            np.linspace(0, duration - 1, max(2, round(duration / 40000)))
-        ).astype(dtype=int)
-        line_length_eeg = np.empty((nr_channels, time_points.take(-1)))
-
-        # iterate over time points
-        for idx in range(len(time_points) - 1):
-            # extract a segment of eeg data containing the data of a single time interval
-            # (i.e. time_points[idx] up to time_points[idx + 1])
-            if idx == len(time_points) - 2:
-                eeg_interval = np.concatenate(
-                    (
-                        eeg_data[:, time_points[idx] : time_points[idx + 1]],
-                        np.zeros((nr_channels, w_eff)),
-                    ),
-                    axis=1,
-                )
-            else:
-                # add a pad to the time dimension of size w_eff
-                eeg_interval = np.array(
-                    eeg_data[:, time_points[idx] : time_points[idx + 1] + w_eff]
-                )
-
-            # build cuboid containing w_eff number of [nr_channels, interval_length]-planes,
-            # where each plane is shifted by a millisecond w.r.t. the preceding plane
-            eeg_cuboid = np.empty((eeg_interval.shape[0], eeg_interval.shape[1], w_eff))
-            for j in range(w_eff):
-                eeg_cuboid[:, :, j] = np.concatenate(
-                    (eeg_interval[:, j:], np.zeros((nr_channels, j))), axis=1
-                )
-
-            # perform line length computations
-            line_length_interval = np.nansum(np.abs(np.diff(eeg_cuboid, 1, 2)), 2)
-
-            # remove the pad
-            line_length_eeg[
-                :, time_points[idx] : time_points[idx + 1]
-            ] = line_length_interval[:, : line_length_interval.shape[1] - w_eff]
-
-        # center the data a window
-        line_length_eeg = np.concatenate(
-            (
-                np.zeros((nr_channels, np.floor(w_eff / 2).astype(int))),
-                line_length_eeg[:, : -np.ceil(w_eff / 2).astype(int)],
-            ),
-            axis=1,
+        # perform line length computations; the line length at time point t is the
+        # sum of the absolute differences of consecutive time points over a window
+        # of w_eff samples starting at t; the jit-compiled kernel fuses the abs,
+        # diff and windowed sum into a single pass over the data and centers the
+        # values on their windows by writing them half a window shifted into the
+        # output, so no separate zero pad and concatenate copy is needed
+        line_length_eeg = np.empty((nr_channels, duration - 1), dtype=eeg_data.dtype)
+        _line_length_kernel(
+            np.ascontiguousarray(eeg_data), w_eff, w_eff // 2, line_length_eeg
         )
 
         return line_length_eeg
@@ -241,6 +261,11 @@ class LineLength:
         # Extract channel names
         channel_names = [trace.label for trace in traces]
 
+        # The bandpass filter leaves no content above its upper cutoff, so the
+        # line length can be computed at the corresponding Nyquist rate; capping
+        # the resampling frequency accordingly shrinks every downstream pass
+        resampling_freq = min(resampling_freq, 2 * bandpass_cutoff_high)
+
         # Preprocess the data
         preprocessed = apply_preprocessing_steps(
             traces=traces,
@@ -277,6 +302,57 @@ class LineLength:
 
         return line_length_resampled_data
 
+    def _line_length_worker(
+        self,
+        shm_name: str,
+        shape: Tuple[int, int],
+        dtype: np.dtype,
+        out_shm_name: str,
+        out_shape: Tuple[int, int],
+        row_start: int,
+        row_stop: int,
+        labels: List[str],
+        sfreq: int,
+        start_timestamp: float,
+        notch_freq: int,
+        resampling_freq: int,
+        bandpass_cutoff_low: int,
+        bandpass_cutoff_high: int,
+    ) -> None:
+        """
+        Worker wrapper around :py:func:`line_length_pipeline` that reconstructs its
+        subset of traces as views into the shared memory block created by
+        :py:func:`apply_parallel_line_length_pipeline`, avoiding pickling the
+        EEG data into the worker processes. The labels list contains only the
+        labels of the rows within [row_start, row_stop). The result is written
+        directly into the corresponding rows of the shared output block instead
+        of being returned.
+        """
+        shm = shared_memory.SharedMemory(name=shm_name)
+        out_shm = shared_memory.SharedMemory(name=out_shm_name)
+        try:
+            data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            out = np.ndarray(out_shape, dtype=np.float32, buffer=out_shm.buf)
+            traces = [
+                Trace(
+                    label=label,
+                    sfreq=sfreq,
+                    start_timestamp=start_timestamp,
+                    data=data[row],
+                )
+                for label, row in zip(labels, range(row_start, row_stop))
+            ]
+            out[row_start:row_stop] = self.line_length_pipeline(
+                traces,
+                notch_freq,
+                resampling_freq,
+                bandpass_cutoff_low,
+                bandpass_cutoff_high,
+            )
+        finally:
+            shm.close()
+            out_shm.close()
+
     def apply_parallel_line_length_pipeline(
         self,
         notch_freq: int = 50,
@@ -351,34 +427,93 @@ class LineLength:
                 self.leads,
             )
             # Extract the channel names
-            labels.extend([trace.label for trace in traces])
+            subset_labels = [trace.label for trace in traces]
+            labels.extend(subset_labels)
 
             # Start time of the recording
             start_timestamp = traces[0].start_timestamp
+            sfreq = traces[0].sfreq
 
             # Using all available cores for process pool
             n_cores = multiprocessing.cpu_count()
 
             # Define the number of parallel process used for preprocessing and line-length transformation
-            n_processes = min(5, len(channel_set))
-
-            with multiprocessing.Pool(processes=n_cores) as pool:
-                line_length = pool.starmap(
-                    self.line_length_pipeline,
-                    [
-                        (
-                            data,
-                            notch_freq,
-                            resampling_freq,
-                            bandpass_cutoff_low,
-                            bandpass_cutoff_high,
-                        )
-                        for data in np.array_split(traces, n_processes)
-                    ],
+            n_processes = min(5, len(traces))
+
+            # Write the trace data directly into a single shared memory block such
+            # that the workers receive only a reference and a row range instead of
+            # pickled copies of the EEG data; filling row by row avoids a second
+            # full-size stacked copy in the parent
+            shape = (len(traces), traces[0].data.shape[0])
+            # the preprocessing stack computes in float32 throughout, sharing
+            # the raw data in float32 halves the block size
+            dtype = np.dtype(np.float32)
+            shm = shared_memory.SharedMemory(
+                create=True, size=shape[0] * shape[1] * dtype.itemsize
+            )
+            shared_data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            for row, trace in enumerate(traces):
+                shared_data[row] = trace.data
+
+            # Contiguous row ranges assigning a subset of channels to each worker
+            row_bounds = np.array_split(np.arange(len(traces)), n_processes)
+
+            # Preallocate the output as a shared block the workers write their
+            # rows into directly, instead of pickling per-worker results back and
+            # concatenating them in the parent; mirrors the frequency cap and the
+            # resampling chain of line_length_pipeline to size the time axis
+            eff_resampling_freq = min(resampling_freq, 2 * bandpass_cutoff_high)
+            duration_preprocessed = resampled_length(
+                shape[1], sfreq, eff_resampling_freq
+            )
+            out_shape = (
+                len(traces),
+                resampled_length(
+                    duration_preprocessed - 1, eff_resampling_freq, line_length_freq
+                ),
+            )
+            out_shm = shared_memory.SharedMemory(
+                create=True,
+                size=out_shape[0] * out_shape[1] * np.dtype(np.float32).itemsize,
+            )
+
+            try:
+                with multiprocessing.Pool(
+                    processes=min(n_processes, n_cores),
+                    initializer=limit_worker_threads,
+                ) as pool:
+                    pool.starmap(
+                        self._line_length_worker,
+                        [
+                            (
+                                shm.name,
+                                shape,
+                                dtype,
+                                out_shm.name,
+                                out_shape,
+                                rows[0],
+                                rows[-1] + 1,
+                                subset_labels[rows[0] : rows[-1] + 1],
+                                sfreq,
+                                start_timestamp,
+                                notch_freq,
+                                resampling_freq,
+                                bandpass_cutoff_low,
+                                bandpass_cutoff_high,
+                            )
+                            for rows in row_bounds
+                        ],
+                    )
+
+                line_length_subset = np.array(
+                    np.ndarray(out_shape, dtype=np.float32, buffer=out_shm.buf)
                 )
+            finally:
+                shm.close()
+                shm.unlink()
+                out_shm.close()
+                out_shm.unlink()
 
-            # Combine results from parallel processing
-            line_length_subset = np.concatenate(line_length, axis=0)
             line_length_list.append(line_length_subset)
 
         return start_timestamp, labels, np.concatenate(line_length_list, axis=0)
@@ -458,8 +593,7 @@ class LineLength:
         detected_periods = threshold_generator.find_events(threshold)
 
         # Create unique id
-        filename = self.file_path[self.file_path.rfind("/") + 1 :]
-        unique_id = f"{filename[:filename.rfind('.')]}_std_line_length"
+        unique_id = f"{self._file_stem}_std_line_length"
 
         return ActivationFunction(
             label="Std Line Length",
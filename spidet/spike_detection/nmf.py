@@ -1,10 +1,15 @@
+import copy
 from typing import Tuple, Dict
 
-import nimfa
 import numpy as np
+from joblib import Parallel, delayed
 from loguru import logger
-from scipy.cluster.hierarchy import linkage, cophenet
+from fastcluster import linkage
+from scipy.cluster.hierarchy import cophenet
+from scipy.spatial.distance import squareform
+from sklearn.utils.extmath import randomized_svd
 
+from spidet.domain.Hals import Hals
 from spidet.domain.Nmfsc import Nmfsc
 
 
@@ -28,17 +33,10 @@ class Nmf:
 
     @staticmethod
     def __calculate_cophenetic_corr(consensus_matrix: np.ndarray) -> np.ndarray:
-        # Extract the values from the lower triangle of A
-        avec = np.array(
-            [
-                consensus_matrix[i, j]
-                for i in range(consensus_matrix.shape[0] - 1)
-                for j in range(i + 1, consensus_matrix.shape[1])
-            ]
-        )
-
-        # Consensus entries are similarities, conversion to distances
-        Y = 1 - avec
+        # Consensus entries are similarities, conversion to distances; squareform
+        # extracts the condensed off-diagonal vector in a single compiled copy
+        # (checks skipped, the consensus matrix is symmetric by construction)
+        Y = squareform(1 - consensus_matrix, checks=False)
 
         # Hierarchical clustering
         Z = linkage(Y, method="average")
@@ -48,10 +46,151 @@ class Nmf:
 
         return coph
 
+    @staticmethod
+    def __nndsvd_init(
+        data_matrix: np.ndarray[np.dtype[float]], rank: int
+    ) -> Tuple[np.ndarray[np.dtype[float]], np.ndarray[np.dtype[float]]]:
+        """
+        Computes a nonnegative double singular value decomposition (NNDSVD)
+        warm start for the :math:`W` and :math:`H` matrices from a randomized
+        rank-truncated SVD of the data (Boutsidis & Gallopoulos 2008). Compared
+        to a purely random initialization, the factorization starts close to
+        the dominant structure of the data and spends its iteration budget on
+        refinement instead of burning off randomness.
+        """
+        U, S, Vt = randomized_svd(
+            data_matrix, n_components=rank, n_oversamples=10, random_state=0
+        )
+        eps = np.finfo(data_matrix.dtype).eps
+
+        W = np.zeros((data_matrix.shape[0], rank), dtype=data_matrix.dtype)
+        H = np.zeros((rank, data_matrix.shape[1]), dtype=data_matrix.dtype)
+
+        # The leading singular vectors of a nonnegative matrix are nonnegative
+        # up to sign
+        W[:, 0] = np.sqrt(S[0]) * np.abs(U[:, 0])
+        H[0, :] = np.sqrt(S[0]) * np.abs(Vt[0, :])
+
+        # For the remaining components, keep the larger of the positive and
+        # negative sections of each singular vector pair
+        for j in range(1, rank):
+            u_pos, u_neg = np.maximum(U[:, j], 0), np.maximum(-U[:, j], 0)
+            v_pos, v_neg = np.maximum(Vt[j, :], 0), np.maximum(-Vt[j, :], 0)
+            norms = (
+                np.linalg.norm(u_pos),
+                np.linalg.norm(u_neg),
+                np.linalg.norm(v_pos),
+                np.linalg.norm(v_neg),
+            )
+            if norms[0] * norms[2] >= norms[1] * norms[3]:
+                u, v, u_norm, v_norm = u_pos, v_pos, norms[0], norms[2]
+            else:
+                u, v, u_norm, v_norm = u_neg, v_neg, norms[1], norms[3]
+            scale = np.sqrt(S[j] * u_norm * v_norm)
+            W[:, j] = scale * u / max(u_norm, eps)
+            H[j, :] = scale * v / max(v_norm, eps)
+
+        return W, H
+
+    def _single_run(
+        self,
+        nmf,
+        seed: np.random.SeedSequence,
+        w_init: np.ndarray[np.dtype[float]] = None,
+        h_init: np.ndarray[np.dtype[float]] = None,
+    ) -> Tuple[
+        np.ndarray[np.dtype[int]],
+        float,
+        np.ndarray[np.dtype[float]],
+        np.ndarray[np.dtype[float]],
+    ]:
+        """
+        Performs a single factorization with a fresh initialization drawn from
+        the provided seed and returns the cluster labels of the channels, the
+        final reconstruction error and the :math:`W` and :math:`H` matrices of
+        the run. If warm-start matrices are given, the run starts from a
+        randomly perturbed copy of them instead of a purely random
+        initialization.
+        """
+        # the runs may execute concurrently on threads of the same process;
+        # factorizing a shallow copy keeps the factor state of a run private
+        # while the data matrix itself stays shared read-only
+        nmf = copy.copy(nmf)
+        # the sparse model draws its initial factors from its own generator;
+        # replacing it with one seeded from the spawned sequence keeps those
+        # draws, like the warm-start perturbation below, reproducible when
+        # nmf_run is given a fixed random_state
+        nmf.prng = np.random.RandomState(seed.generate_state(1)[0])
+        if w_init is not None:
+            # perturbed copies of the shared warm start, drawn from a per-run
+            # generator so the runs stay independent of which thread they land
+            # on and reproducible when nmf_run is given a fixed random_state.
+            # the generator yields float64, cast the perturbation back to the
+            # warm start's dtype so a float32 factorization stays float32
+            rng = np.random.default_rng(seed)
+            scale = 0.1 * w_init.mean()
+            nmf.W = w_init + (scale * rng.random(w_init.shape)).astype(w_init.dtype)
+            nmf.H = h_init + (scale * rng.random(h_init.shape)).astype(h_init.dtype)
+        fit = nmf()
+        # the connectivity matrix is fully determined by the per-channel argmax
+        # labels; returning the label vector instead keeps the transfer from
+        # the parallel jobs at n instead of n^2 entries, the outer equality is
+        # reconstructed during accumulation
+        labels = np.asarray(fit.basis().argmax(axis=1)).ravel().astype(np.int32)
+        return (
+            labels,
+            fit.final_obj,
+            np.array(fit.basis()),
+            np.array(fit.coef()),
+        )
+
+    def _single_run_gpu(
+        self,
+        cp,
+        data_gpu,
+        seed: np.random.SeedSequence,
+        w_init: np.ndarray[np.dtype[float]],
+        h_init: np.ndarray[np.dtype[float]],
+        max_iter: int = 10,
+    ) -> Tuple[
+        np.ndarray[np.dtype[int]],
+        float,
+        np.ndarray[np.dtype[float]],
+        np.ndarray[np.dtype[float]],
+    ]:
+        """
+        Performs a single factorization on the GPU with multiplicative updates.
+        The per-iteration work is four GEMMs, which cuBLAS executes far faster
+        than host BLAS at these sizes; only the small :math:`W` and :math:`H`
+        matrices are transferred back to the host.
+        """
+        rng = cp.random.default_rng(int(seed.generate_state(1)[0]))
+        scale = cp.float32(0.1 * w_init.mean())
+        w = cp.asarray(w_init, dtype=cp.float32)
+        w += scale * rng.random(w.shape, dtype=cp.float32)
+        h = cp.asarray(h_init, dtype=cp.float32)
+        h += scale * rng.random(h.shape, dtype=cp.float32)
+
+        eps = cp.float32(np.finfo(np.float32).eps)
+        for _ in range(max_iter):
+            h *= (w.T @ data_gpu) / (w.T @ w @ h + eps)
+            w *= (data_gpu @ h.T) / (w @ (h @ h.T) + eps)
+
+        residual = data_gpu - w @ h
+        final_obj = float(0.5 * cp.sum(residual * residual))
+        labels = cp.asnumpy(cp.argmax(w, axis=1)).astype(np.int32)
+
+        return labels, final_obj, cp.asnumpy(w), cp.asnumpy(h)
+
     def nmf_run(
         self,
         preprocessed_data: np.ndarray[np.dtype[float]],
         n_runs: int,
+        n_jobs: int = 1,
+        check_every: int = 10,
+        early_stop_tol: float = 1e-3,
+        backend: str = "numpy",
+        random_state: int = None,
     ) -> Tuple[
         Dict,
         np.ndarray[np.dtype[float]],
@@ -72,6 +211,32 @@ class Nmf:
         n_runs: int
             The number of NMF runs.
 
+        n_jobs: int, optional, default = 1
+            The number of worker threads the runs are dispatched to. Threads
+            are used rather than processes so the dispatch also works inside
+            the daemonic workers of the pipeline's rank pool; 1 performs the
+            runs sequentially.
+
+        check_every: int, optional, default = 10
+            The number of runs performed between checks of the cophenetic
+            correlation of the accumulated consensus matrix.
+
+        early_stop_tol: float, optional, default = 1e-3
+            The remaining runs are skipped once the cophenetic correlation has
+            changed by less than this tolerance over two consecutive checks,
+            i.e. once the consensus matrix has stabilized. Set to 0 to always
+            perform all n_runs runs.
+
+        backend: str, optional, default = 'numpy'
+            If 'cupy' and cupy is installed, the non-sparse runs are performed
+            on the GPU with multiplicative updates; otherwise the runs stay on
+            the CPU. Sparse factorizations always run on the CPU.
+
+        random_state: int, optional, default = None
+            Root seed for the per-run initializations. For a fixed value the
+            runs are reproducible regardless of n_jobs; None draws fresh
+            entropy on every call.
+
         Returns
         -------
         Tuple[Dict,
@@ -82,47 +247,102 @@ class Nmf:
             and the instability index, together with the consensus, :math:`W` and :math:`H` matrices.
         """
         data_matrix = preprocessed_data
-        consensus = np.zeros((data_matrix.shape[0], data_matrix.shape[0]))
-        obj = np.zeros(n_runs)
-        lowest_obj = float("inf")
-        h_best = None
-        w_best = None
 
         if self.sparseness == 0.0:
-            nmf = nimfa.Nmf(
-                data_matrix.T, rank=self.rank, seed="random_vcol", max_iter=10
-            )
+            nmf = Hals(data_matrix, rank=self.rank, max_iter=10)
+            # deterministic nonnegative SVD warm start, computed once per rank
+            # and perturbed per run
+            w_init, h_init = self.__nndsvd_init(data_matrix, self.rank)
         else:
             nmf = Nmfsc(data_matrix, rank=self.rank, max_iter=10, sW=self.sparseness)
+            w_init = h_init = None
 
-        for n in range(n_runs):
-            logger.debug(
-                f"Rank {self.rank}, Run {n + 1}/{n_runs}: Perform matrix factorization"
-            )
-            if self.sparseness != 0.0:
-                fit = nmf()
-                consensus += fit.connectivity()
-                obj[n] = fit.final_obj
-                if obj[n] < lowest_obj:
-                    logger.debug(
-                        f"Rank {self.rank}, Run {n + 1}/{n_runs}: Update COEFFICIENTS and BASIS FCTs"
-                    )
-                    lowest_obj = obj[n]
-                    w_best = np.array(fit.basis())
-                    h_best = np.array(fit.coef())
+        # optional GPU offload, guarded so a missing cupy falls back to the CPU
+        cp = data_gpu = None
+        if backend == "cupy" and self.sparseness == 0.0:
+            try:
+                import cupy as cp
+
+                data_gpu = cp.asarray(data_matrix, dtype=cp.float32)
+            except ImportError:
+                logger.warning(
+                    "backend='cupy' requested but cupy is not installed, "
+                    "running on the CPU instead"
+                )
+                cp = None
+
+        logger.debug(
+            f"Rank {self.rank}: Perform {n_runs} matrix factorizations on {n_jobs} thread(s)"
+        )
+
+        # The runs are independent factorizations differing only in their random
+        # initialization; dispatch them to parallel jobs with one spawned seed
+        # per run, in batches of check_every so the consensus can be inspected
+        # for early stopping between batches, and reduce afterwards
+        seeds = np.random.SeedSequence(random_state).spawn(n_runs)
+        results = []
+
+        # accumulate the boolean argmax-outer-equality connectivities in uint16
+        # (n_runs fits comfortably) and convert to float only once per check
+        consensus_counts = np.zeros(
+            (data_matrix.shape[0], data_matrix.shape[0]), dtype=np.uint16
+        )
+        previous_coph = None
+        stable_checks = 0
+        for batch_start in range(0, n_runs, check_every):
+            batch_seeds = seeds[batch_start : batch_start + check_every]
+            if cp is not None:
+                # GPU runs are dispatched sequentially, the GEMMs inside each
+                # run already saturate the device
+                batch_results = [
+                    self._single_run_gpu(cp, data_gpu, seed, w_init, h_init)
+                    for seed in batch_seeds
+                ]
             else:
-                fit = nmf()
-                consensus += fit.fit.connectivity()
-                obj[n] = fit.fit.final_obj
-                if obj[n] < lowest_obj:
-                    logger.debug(
-                        f"Rank {self.rank}, Run {n + 1}/{n_runs}: Update COEFFICIENTS and BASIS FCTs"
-                    )
-                    lowest_obj = obj[n]
-                    w_best = np.array(fit.fit.coef().T)
-                    h_best = np.array(fit.fit.basis().T)
-
-        consensus /= n_runs
+                # threads rather than the default loky processes: the pipeline
+                # invokes nmf_run inside daemonic pool workers, where loky
+                # cannot start its own processes and silently falls back to a
+                # single job; the HALS sweeps spend their time in BLAS kernels
+                # which release the GIL, so threads parallelize them as well
+                batch_results = Parallel(n_jobs=n_jobs, backend="threading")(
+                    delayed(self._single_run)(nmf, seed, w_init, h_init)
+                    for seed in batch_seeds
+                )
+            results.extend(batch_results)
+            for labels, _, _, _ in batch_results:
+                consensus_counts += labels[:, None] == labels[None, :]
+
+            # consensus is a running mean over the runs; once its cophenetic
+            # correlation no longer moves between checks the remaining runs
+            # cannot change the downstream rank metrics appreciably
+            if early_stop_tol and len(results) < n_runs:
+                coph_check = self.__calculate_cophenetic_corr(
+                    consensus_counts.astype(np.float32) / len(results)
+                )
+                if (
+                    previous_coph is not None
+                    and abs(coph_check - previous_coph) < early_stop_tol
+                ):
+                    stable_checks += 1
+                    if stable_checks >= 2:
+                        logger.debug(
+                            f"Rank {self.rank}: Consensus stabilized after "
+                            f"{len(results)} of {n_runs} runs, stopping early"
+                        )
+                        break
+                else:
+                    stable_checks = 0
+                previous_coph = coph_check
+
+        n_completed = len(results)
+        obj = np.array([final_obj for _, final_obj, _, _ in results])
+
+        best_run = int(np.argmin(obj))
+        lowest_obj = obj[best_run]
+        w_best = results[best_run][2]
+        h_best = results[best_run][3]
+
+        consensus = consensus_counts.astype(np.float32) / n_completed
         coph = self.__calculate_cophenetic_corr(consensus)
         instability = 1 - coph
 
@@ -134,6 +354,6 @@ class Nmf:
             "Instability index": instability,
         }
 
-        logger.debug(f"Rank {self.rank}: Finished {n_runs} iterations of NMF")
+        logger.debug(f"Rank {self.rank}: Finished {n_completed} iterations of NMF")
 
         return metrics, consensus, h_best, w_best
@@ -1,6 +1,6 @@
-import logging
 import multiprocessing
 import os
+from multiprocessing import shared_memory
 from datetime import datetime
 from typing import Tuple, List, Dict
 
@@ -19,6 +19,7 @@ from spidet.spike_detection.clustering import BasisFunctionClusterer
 from spidet.spike_detection.line_length import LineLength
 from spidet.spike_detection.nmf import Nmf
 from spidet.spike_detection.thresholding import ThresholdGenerator
+from spidet.utils.pool_utils import limit_worker_threads
 from spidet.utils.times_utils import compute_rescaled_timeline
 from spidet.utils.plotting_utils import plot_w_and_consensus_matrix
 
@@ -54,6 +55,11 @@ class SpikeDetectionPipeline:
         the H matrix containing the activation functions for each rank, the line-length transformed data and
         the standard deviation of the line length are saved.
 
+    save_as_csv: bool
+        If True, the matrices saved under save_nmf_matrices are written as CSV text files as before.
+        By default they are written as binary .npy files, which skips the per-element decimal
+        formatting and produces considerably smaller files.
+
     sparseness: float
         A floating point number :math:`\in [0, 1]`.
         If this parameter is non-zero, nonnegative matrix factorization is run with sparseness constraints.
@@ -81,6 +87,7 @@ class SpikeDetectionPipeline:
         file_path: str,
         results_dir: str = None,
         save_nmf_matrices: bool = False,
+        save_as_csv: bool = False,
         sparseness: float = 0.0,
         bad_times: np.ndarray[np.dtype[float]] = None,
         nmf_runs: int = 100,
@@ -89,8 +96,11 @@ class SpikeDetectionPipeline:
     ):
         self.sparseness = sparseness
         self.file_path = file_path
+        # filename without directory and extension, used as unique id prefix
+        self._file_stem = Path(file_path).stem
         self.results_dir: str = self.__create_results_dir(results_dir)
         self.save_nmf_matrices: bool = save_nmf_matrices
+        self.save_as_csv: bool = save_as_csv
         self.bad_times = bad_times
         self.nmf_runs: int = nmf_runs
         self.rank_range: Tuple[int, int] = rank_range
@@ -99,11 +109,18 @@ class SpikeDetectionPipeline:
         # Configure logger
         logging_utils.add_logger_with_process_name(self.results_dir)
 
+    def __save_matrix(self, path: str, matrix: np.ndarray) -> None:
+        # np.save writes the raw float buffer in a single call; np.savetxt
+        # formats every element as a decimal string and is kept as an opt-in
+        if self.save_as_csv:
+            np.savetxt(f"{path}.csv", matrix, delimiter=",")
+        else:
+            np.save(f"{path}.npy", matrix)
+
     def __create_results_dir(self, results_dir: str):
         # Create folder to save results
-        file_path = self.file_path
         filename_for_saving = (
-            file_path[file_path.rfind("/") + 1 :].replace(".", "_").replace(" ", "_")
+            Path(self.file_path).name.replace(".", "_").replace(" ", "_")
         )
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         nmf_version = "NMFSC" if self.sparseness != 0.0 else "NMF"
@@ -118,11 +135,12 @@ class SpikeDetectionPipeline:
         return results_dir
 
     @staticmethod
-    def __compute_cdf(matrix: np.ndarray, bins: np.ndarray):
-        N = matrix.shape[0]
-        values = matrix[np.triu_indices(N)]
+    def __compute_cdf(matrix: np.ndarray, bins: np.ndarray, triu_indices: Tuple):
+        # consider only the upper triangle above the diagonal; the diagonal holds
+        # the trivial self-similarities (all 1.0) and would bias the CDF
+        values = matrix[triu_indices]
         counts, _ = np.histogram(values, bins=bins, density=True)
-        cdf_vals = np.cumsum(counts) / (N * (N - 1) / 2)
+        cdf_vals = np.cumsum(counts) / len(values)
         return cdf_vals + 1e-10  # add a small offset to avoid div0!
 
     @staticmethod
@@ -134,9 +152,8 @@ class SpikeDetectionPipeline:
         delta_k = np.zeros(len(areas))
         delta_y = np.zeros(len(areas))
         delta_k[0] = areas[0]
-        for i in range(1, len(areas)):
-            delta_k[i] = (areas[i] - areas[i - 1]) / areas[i - 1]
-            delta_y[i] = sum(rel_entr(cdfs[:, i], cdfs[:, i - 1]))
+        delta_k[1:] = np.diff(areas) / areas[:-1]
+        delta_y[1:] = rel_entr(cdfs[:, 1:], cdfs[:, :-1]).sum(axis=0)
         return delta_k, delta_y
 
     def __calculate_statistics(self, consensus_matrices: List[np.ndarray]):
@@ -148,8 +165,11 @@ class SpikeDetectionPipeline:
         cdfs = np.zeros((num_bins, k_max - k_min + 1))
         areas = np.zeros(k_max - k_min + 1)
 
+        # all consensus matrices share the same shape, compute the indices once
+        triu_indices = np.triu_indices(consensus_matrices[0].shape[0], k=1)
+
         for idx, consensus in enumerate(consensus_matrices):
-            cdf_vals = self.__compute_cdf(consensus, bins)
+            cdf_vals = self.__compute_cdf(consensus, bins, triu_indices)
             areas[idx] = self.__compute_cdf_area(cdf_vals, bin_width)
             cdfs[:, idx] = cdf_vals
 
@@ -163,6 +183,7 @@ class SpikeDetectionPipeline:
         preprocessed_data: np.ndarray,
         rank: int,
         n_runs: int,
+        n_jobs: int = 1,
     ) -> Tuple[
         Dict,
         np.ndarray[np.dtype[float]],
@@ -172,7 +193,7 @@ class SpikeDetectionPipeline:
         float,
         Dict[int, int],
     ]:
-        logging.debug(f"Starting Spike detection pipeline for rank {rank}")
+        logger.debug(f"Starting Spike detection pipeline for rank {rank}")
 
         #####################
         #   NMF             #
@@ -183,7 +204,7 @@ class SpikeDetectionPipeline:
 
         # Run NMF consensus clustering for specified rank and number of runs (default = 100)
         metrics, consensus, h_best, w_best = nmf_classifier.nmf_run(
-            preprocessed_data, n_runs
+            preprocessed_data, n_runs, n_jobs
         )
 
         #####################
@@ -218,6 +239,27 @@ class SpikeDetectionPipeline:
             cluster_assignments,
         )
 
+    def _nmf_worker(
+        self,
+        shm_name: str,
+        shape: Tuple[int, int],
+        dtype: np.dtype,
+        rank: int,
+        n_runs: int,
+        n_jobs: int = 1,
+    ):
+        """
+        Worker wrapper around :py:func:`perform_nmf_steps_for_rank` that reads the
+        normalized data matrix from the shared memory block created by
+        :py:func:`parallel_processing` instead of receiving a pickled copy per rank.
+        """
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            data_matrix = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            return self.perform_nmf_steps_for_rank(data_matrix, rank, n_runs, n_jobs)
+        finally:
+            shm.close()
+
     def parallel_processing(
         self,
         preprocessed_data: np.ndarray[np.dtype[float]],
@@ -233,25 +275,56 @@ class SpikeDetectionPipeline:
         rank_list = list(range(self.rank_range[0], self.rank_range[1] + 1))
         nr_ranks = len(rank_list)
 
-        # Normalize for NMF (preprocessed data needs to be non-negative)
-        data_matrix = normalize(preprocessed_data)
+        # Normalize for NMF (preprocessed data needs to be non-negative): L2 norm
+        # per channel row, stated explicitly rather than relying on the sklearn
+        # defaults; float32 is sufficient for the factorization and halves the
+        # footprint of the shared input
+        data_matrix = np.ascontiguousarray(
+            normalize(preprocessed_data, norm="l2", axis=1), dtype=np.float32
+        )
 
-        # Using all cores except 2 if necessary
-        n_cores = multiprocessing.cpu_count() - 2
+        # Using all cores except 2 if necessary, but no more workers than ranks;
+        # cores not occupied by a rank worker are used by run threads within
+        # each rank
+        n_cores = max(1, multiprocessing.cpu_count() - 2)
+        n_workers = min(nr_ranks, n_cores)
+        n_jobs_per_rank = max(1, n_cores // n_workers)
 
         logger.debug(
-            f"Running NMF on {n_cores if nr_ranks > n_cores else nr_ranks} cores "
-            f"for ranks {rank_list} and {self.nmf_runs} runs each"
+            f"Running NMF on {n_workers} cores "
+            f"for ranks {rank_list} and {self.nmf_runs} runs each "
+            f"({n_jobs_per_rank} run thread(s) per rank)"
         )
 
-        with multiprocessing.Pool(processes=n_cores) as pool:
-            results = pool.starmap(
-                self.perform_nmf_steps_for_rank,
-                [
-                    (data_matrix, rank, self.nmf_runs)
-                    for rank in range(self.rank_range[0], self.rank_range[1] + 1)
-                ],
-            )
+        # Expose the normalized matrix to the rank workers through a single shared
+        # memory block instead of pickling one copy of it per rank
+        shm = shared_memory.SharedMemory(create=True, size=data_matrix.nbytes)
+        shared_data = np.ndarray(
+            data_matrix.shape, dtype=data_matrix.dtype, buffer=shm.buf
+        )
+        shared_data[:] = data_matrix
+
+        try:
+            with multiprocessing.Pool(
+                processes=n_workers, initializer=limit_worker_threads
+            ) as pool:
+                results = pool.starmap(
+                    self._nmf_worker,
+                    [
+                        (
+                            shm.name,
+                            data_matrix.shape,
+                            data_matrix.dtype,
+                            rank,
+                            self.nmf_runs,
+                            n_jobs_per_rank,
+                        )
+                        for rank in rank_list
+                    ],
+                )
+        finally:
+            shm.close()
+            shm.unlink()
 
         # Extract return objects from results
         consensus_matrices = [consensus for _, consensus, _, _, _, _, _ in results]
@@ -303,14 +376,9 @@ class SpikeDetectionPipeline:
             )
 
             # Saving line length and std line length
-            np.savetxt(
-                f"{self.results_dir}/line_length.csv", data_matrix, delimiter=","
-            )
-
-            np.savetxt(
-                f"{self.results_dir}/std_line_length.csv",
-                np.std(data_matrix, axis=0),
-                delimiter=",",
+            self.__save_matrix(f"{self.results_dir}/line_length", data_matrix)
+            self.__save_matrix(
+                f"{self.results_dir}/std_line_length", np.std(data_matrix, axis=0)
             )
 
             for idx in range(nr_ranks):
@@ -322,13 +390,9 @@ class SpikeDetectionPipeline:
                 saving_path = os.path.join(self.results_dir, f"k={rank_list[idx]}")
                 os.makedirs(saving_path, exist_ok=True)
 
-                np.savetxt(f"{saving_path}/H_best.csv", h_matrix, delimiter=",")
-                np.savetxt(f"{saving_path}/W_best.csv", w_matrix, delimiter=",")
-                np.savetxt(
-                    f"{saving_path}/consensus_matrix.csv",
-                    consensus_matrix,
-                    delimiter=",",
-                )
+                self.__save_matrix(f"{saving_path}/H_best", h_matrix)
+                self.__save_matrix(f"{saving_path}/W_best", w_matrix)
+                self.__save_matrix(f"{saving_path}/consensus_matrix", consensus_matrix)
 
                 # Saving event annotations
                 spikes = event_annotations[idx]
@@ -452,8 +516,7 @@ class SpikeDetectionPipeline:
         )
 
         # Create unique id prefix
-        filename = self.file_path[self.file_path.rfind("/") + 1 :]
-        unique_id_prefix = filename[: filename.rfind(".")]
+        unique_id_prefix = self._file_stem
 
         # Compute times for H x-axis
         times = compute_rescaled_timeline(
@@ -0,0 +1,28 @@
+import os
+
+from threadpoolctl import threadpool_limits
+
+THREADPOOL_ENV_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def limit_worker_threads() -> None:
+    """
+    Initializer for worker processes of a :py:class:`multiprocessing.Pool`.
+
+    Pins the thread pools of the numerical backends (BLAS, FFT, numexpr) to a
+    single thread within each worker. Without this, every worker spawns its own
+    set of backend threads which compete for the cores already occupied by the
+    other workers.
+    """
+    # the environment variables are only read at library initialization, which
+    # under the fork start method already happened in the parent; they are set
+    # for libraries loaded later, while threadpoolctl caps the pools of the
+    # already loaded backends directly
+    for variable in THREADPOOL_ENV_VARIABLES:
+        os.environ[variable] = "1"
+    threadpool_limits(limits=1)